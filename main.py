@@ -1,20 +1,29 @@
 import os
+import re
+import json
+import hashlib
+import sys
 import math
+import time
 import asyncio
 import aiosqlite
+from collections import OrderedDict
 from dataclasses import dataclass
-from datetime import datetime, timezone
-from typing import Dict, Any, List, Optional, Tuple
+from functools import lru_cache
+from types import MappingProxyType
+from typing import Dict, Any, List, Mapping, Optional, Tuple
 
 import discord
-from discord.ext import commands, tasks
+from discord.ext import commands
 from discord import app_commands
 
 # ===================== CONFIG =====================
 TOKEN = os.getenv("DISCORD_TOKEN")
 DB_PATH = os.getenv("DB_PATH", "data.sqlite3")
-CHECK_INTERVAL_SEC = int(os.getenv("CHECK_INTERVAL_SEC", "30"))
+CHECK_INTERVAL_SEC = int(os.getenv("CHECK_INTERVAL_SEC", "30"))  # max watcher sleep; covers host suspend
 DEFAULT_TZ = os.getenv("DEFAULT_TZ", "UTC")
+SYNC_COMMANDS = os.getenv("SYNC_COMMANDS") == "1"  # force a global slash-command sync on start
+COMMANDS_HASH_PATH = os.getenv("COMMANDS_HASH_PATH", DB_PATH + ".commands")  # hash of the last synced tree
 
 EPHEMERAL = True  # dashboard responses private to user
 
@@ -23,7 +32,7 @@ intents.message_content = False
 bot = commands.Bot(command_prefix="!", intents=intents)
 
 def now_ms() -> int:
-    return int(datetime.now(tz=timezone.utc).timestamp() * 1000)
+    return time.time_ns() // 1_000_000
 
 def eta_str(ms: int) -> str:
     if ms <= 0:
@@ -31,24 +40,19 @@ def eta_str(ms: int) -> str:
     s = ms // 1000
     d, s = divmod(s, 86400)
     h, s = divmod(s, 3600)
-    m, _ = divmod(s, 60)
-    parts=[]
-    if d: parts.append(f"{d}d")
-    if h or d: parts.append(f"{h}h")
-    parts.append(f"{m}m")
-    return " ".join(parts)
+    m = s // 60
+    if d: return f"{d}d {h}h {m}m"
+    if h: return f"{h}h {m}m"
+    return f"{m}m"
 
 # ===================== MINION DATA =====================
-# TBA (seconds for one action) per tier pattern
-T12_FAST  = [14,14,12,12,10,10,9,9,8,8,7,6]
-T12_MID   = [17,17,15,15,13,13,12,12,10,10,9,8]
-T12_SLOW  = [29,29,27,27,25,25,23,23,21,21,19,19]
-INTERNALS = [64,192,192,384,384,576,576,768,768,960,960,960]  # items held internally
+# TBA (seconds for one action) per tier pattern, indexed by tier-1
+T12_FAST  = (14,14,12,12,10,10,9,9,8,8,7,6)
+T12_MID   = (17,17,15,15,13,13,12,12,10,10,9,8)
+T12_SLOW  = (29,29,27,27,25,25,23,23,21,21,19,19)
+INTERNALS = (64,192,192,384,384,576,576,768,768,960,960,960)  # items held internally, indexed by tier-1
 
-def tiers_from(speeds: List[int]) -> Dict[int, Dict[str, int]]:
-    return {i+1: {"tba": speeds[i], "internal": INTERNALS[i]} for i in range(12)}
-
-@dataclass
+@dataclass(slots=True, frozen=True)
 class Drop:
     id: str
     per_product: float   # expected amount if drop happens
@@ -58,152 +62,189 @@ class Drop:
 DEFAULT_AP = 2  # actions per product (2 actions -> 1 product)
 
 # --- Minions: include major categories & multi-drops ---
-MINION_DATA: Dict[str, Dict[str, Any]] = {
+_MINION_DATA: Dict[str, Dict[str, Any]] = {
     # Mining
-    "cobblestone": {"name":"Cobblestone","category":"mining","tiers":tiers_from(T12_FAST),"actions_per_product":DEFAULT_AP,"drops":[Drop("cobblestone",1,1.0)]},
-    "coal":        {"name":"Coal","category":"mining","tiers":tiers_from(T12_MID),"actions_per_product":DEFAULT_AP,"drops":[Drop("coal",1,1.0)]},
-    "iron":        {"name":"Iron","category":"mining","tiers":tiers_from(T12_MID),"actions_per_product":DEFAULT_AP,"drops":[Drop("iron_ore",1,1.0)]},
-    "gold":        {"name":"Gold","category":"mining","tiers":tiers_from(T12_MID),"actions_per_product":DEFAULT_AP,"drops":[Drop("gold_ore",1,1.0)]},
-    "diamond":     {"name":"Diamond","category":"mining","tiers":tiers_from(T12_FAST),"actions_per_product":DEFAULT_AP,"drops":[Drop("diamond",1,1.0)]},
-    "lapis":       {"name":"Lapis","category":"mining","tiers":tiers_from(T12_SLOW),"actions_per_product":DEFAULT_AP,"drops":[Drop("lapis_lazuli",4,1.0)]},
-    "redstone":    {"name":"Redstone","category":"mining","tiers":tiers_from(T12_SLOW),"actions_per_product":DEFAULT_AP,"drops":[Drop("redstone",4,1.0)]},
-    "emerald":     {"name":"Emerald","category":"mining","tiers":tiers_from(T12_SLOW),"actions_per_product":DEFAULT_AP,"drops":[Drop("emerald",1,1.0)]},
-    "quartz":      {"name":"Quartz","category":"mining","tiers":tiers_from(T12_MID),"actions_per_product":DEFAULT_AP,"drops":[Drop("quartz",1,1.0)]},
-    "glowstone":   {"name":"Glowstone","category":"mining","tiers":tiers_from(T12_MID),"actions_per_product":DEFAULT_AP,"drops":[Drop("glowstone_dust",3,1.0)]},
-    "obsidian":    {"name":"Obsidian","category":"mining","tiers":tiers_from(T12_MID),"actions_per_product":DEFAULT_AP,"drops":[Drop("obsidian",1,1.0)]},
-    "end_stone":   {"name":"End Stone","category":"mining","tiers":tiers_from(T12_MID),"actions_per_product":DEFAULT_AP,"drops":[Drop("end_stone",1,1.0)]},
-    "mithril":     {"name":"Mithril","category":"mining","tiers":tiers_from(T12_SLOW),"actions_per_product":DEFAULT_AP,"drops":[Drop("mithril",1,1.0)]},
+    "cobblestone": {"name":"Cobblestone","category":"mining","tba":T12_FAST,"actions_per_product":DEFAULT_AP,"drops":(Drop("cobblestone",1,1.0),)},
+    "coal":        {"name":"Coal","category":"mining","tba":T12_MID,"actions_per_product":DEFAULT_AP,"drops":(Drop("coal",1,1.0),)},
+    "iron":        {"name":"Iron","category":"mining","tba":T12_MID,"actions_per_product":DEFAULT_AP,"drops":(Drop("iron_ore",1,1.0),)},
+    "gold":        {"name":"Gold","category":"mining","tba":T12_MID,"actions_per_product":DEFAULT_AP,"drops":(Drop("gold_ore",1,1.0),)},
+    "diamond":     {"name":"Diamond","category":"mining","tba":T12_FAST,"actions_per_product":DEFAULT_AP,"drops":(Drop("diamond",1,1.0),)},
+    "lapis":       {"name":"Lapis","category":"mining","tba":T12_SLOW,"actions_per_product":DEFAULT_AP,"drops":(Drop("lapis_lazuli",4,1.0),)},
+    "redstone":    {"name":"Redstone","category":"mining","tba":T12_SLOW,"actions_per_product":DEFAULT_AP,"drops":(Drop("redstone",4,1.0),)},
+    "emerald":     {"name":"Emerald","category":"mining","tba":T12_SLOW,"actions_per_product":DEFAULT_AP,"drops":(Drop("emerald",1,1.0),)},
+    "quartz":      {"name":"Quartz","category":"mining","tba":T12_MID,"actions_per_product":DEFAULT_AP,"drops":(Drop("quartz",1,1.0),)},
+    "glowstone":   {"name":"Glowstone","category":"mining","tba":T12_MID,"actions_per_product":DEFAULT_AP,"drops":(Drop("glowstone_dust",3,1.0),)},
+    "obsidian":    {"name":"Obsidian","category":"mining","tba":T12_MID,"actions_per_product":DEFAULT_AP,"drops":(Drop("obsidian",1,1.0),)},
+    "end_stone":   {"name":"End Stone","category":"mining","tba":T12_MID,"actions_per_product":DEFAULT_AP,"drops":(Drop("end_stone",1,1.0),)},
+    "mithril":     {"name":"Mithril","category":"mining","tba":T12_SLOW,"actions_per_product":DEFAULT_AP,"drops":(Drop("mithril",1,1.0),)},
 
     # Foraging
-    "oak":       {"name":"Oak","category":"foraging","tiers":tiers_from(T12_MID),"actions_per_product":DEFAULT_AP,"drops":[Drop("oak_wood",1,1.0)]},
-    "spruce":    {"name":"Spruce","category":"foraging","tiers":tiers_from(T12_MID),"actions_per_product":DEFAULT_AP,"drops":[Drop("spruce_wood",1,1.0)]},
-    "birch":     {"name":"Birch","category":"foraging","tiers":tiers_from(T12_MID),"actions_per_product":DEFAULT_AP,"drops":[Drop("birch_wood",1,1.0)]},
-    "jungle":    {"name":"Jungle","category":"foraging","tiers":tiers_from(T12_MID),"actions_per_product":DEFAULT_AP,"drops":[Drop("jungle_wood",1,1.0)]},
-    "acacia":    {"name":"Acacia","category":"foraging","tiers":tiers_from(T12_MID),"actions_per_product":DEFAULT_AP,"drops":[Drop("acacia_wood",1,1.0)]},
-    "dark_oak":  {"name":"Dark Oak","category":"foraging","tiers":tiers_from(T12_MID),"actions_per_product":DEFAULT_AP,"drops":[Drop("dark_oak_wood",1,1.0)]},
+    "oak":       {"name":"Oak","category":"foraging","tba":T12_MID,"actions_per_product":DEFAULT_AP,"drops":(Drop("oak_wood",1,1.0),)},
+    "spruce":    {"name":"Spruce","category":"foraging","tba":T12_MID,"actions_per_product":DEFAULT_AP,"drops":(Drop("spruce_wood",1,1.0),)},
+    "birch":     {"name":"Birch","category":"foraging","tba":T12_MID,"actions_per_product":DEFAULT_AP,"drops":(Drop("birch_wood",1,1.0),)},
+    "jungle":    {"name":"Jungle","category":"foraging","tba":T12_MID,"actions_per_product":DEFAULT_AP,"drops":(Drop("jungle_wood",1,1.0),)},
+    "acacia":    {"name":"Acacia","category":"foraging","tba":T12_MID,"actions_per_product":DEFAULT_AP,"drops":(Drop("acacia_wood",1,1.0),)},
+    "dark_oak":  {"name":"Dark Oak","category":"foraging","tba":T12_MID,"actions_per_product":DEFAULT_AP,"drops":(Drop("dark_oak_wood",1,1.0),)},
 
     # Farming
-    "wheat":       {"name":"Wheat","category":"farming","tiers":tiers_from(T12_FAST),"actions_per_product":DEFAULT_AP,"drops":[Drop("wheat",1,1.0),Drop("seeds",1,1.0)]},
-    "carrot":      {"name":"Carrot","category":"farming","tiers":tiers_from(T12_FAST),"actions_per_product":DEFAULT_AP,"drops":[Drop("carrot",2,1.0)]},
-    "potato":      {"name":"Potato","category":"farming","tiers":tiers_from(T12_FAST),"actions_per_product":DEFAULT_AP,"drops":[Drop("potato",2,1.0)]},
-    "pumpkin":     {"name":"Pumpkin","category":"farming","tiers":tiers_from(T12_MID),"actions_per_product":DEFAULT_AP,"drops":[Drop("pumpkin",1,1.0)]},
-    "melon":       {"name":"Melon","category":"farming","tiers":tiers_from(T12_MID),"actions_per_product":DEFAULT_AP,"drops":[Drop("melon",4,1.0)]},
-    "sugar_cane":  {"name":"Sugar Cane","category":"farming","tiers":tiers_from(T12_FAST),"actions_per_product":DEFAULT_AP,"drops":[Drop("sugar_cane",2,1.0)]},
-    "cactus":      {"name":"Cactus","category":"farming","tiers":tiers_from(T12_FAST),"actions_per_product":DEFAULT_AP,"drops":[Drop("cactus",1,1.0)]},
-    "cocoa":       {"name":"Cocoa","category":"farming","tiers":tiers_from(T12_FAST),"actions_per_product":DEFAULT_AP,"drops":[Drop("cocoa_beans",2,1.0)]},
-    "mushroom":    {"name":"Mushroom","category":"farming","tiers":tiers_from(T12_FAST),"actions_per_product":DEFAULT_AP,"drops":[Drop("mushroom",1,1.0)]},
-    "nether_wart": {"name":"Nether Wart","category":"farming","tiers":tiers_from(T12_FAST),"actions_per_product":DEFAULT_AP,"drops":[Drop("nether_wart",2,1.0)]},
+    "wheat":       {"name":"Wheat","category":"farming","tba":T12_FAST,"actions_per_product":DEFAULT_AP,"drops":(Drop("wheat",1,1.0),Drop("seeds",1,1.0))},
+    "carrot":      {"name":"Carrot","category":"farming","tba":T12_FAST,"actions_per_product":DEFAULT_AP,"drops":(Drop("carrot",2,1.0),)},
+    "potato":      {"name":"Potato","category":"farming","tba":T12_FAST,"actions_per_product":DEFAULT_AP,"drops":(Drop("potato",2,1.0),)},
+    "pumpkin":     {"name":"Pumpkin","category":"farming","tba":T12_MID,"actions_per_product":DEFAULT_AP,"drops":(Drop("pumpkin",1,1.0),)},
+    "melon":       {"name":"Melon","category":"farming","tba":T12_MID,"actions_per_product":DEFAULT_AP,"drops":(Drop("melon",4,1.0),)},
+    "sugar_cane":  {"name":"Sugar Cane","category":"farming","tba":T12_FAST,"actions_per_product":DEFAULT_AP,"drops":(Drop("sugar_cane",2,1.0),)},
+    "cactus":      {"name":"Cactus","category":"farming","tba":T12_FAST,"actions_per_product":DEFAULT_AP,"drops":(Drop("cactus",1,1.0),)},
+    "cocoa":       {"name":"Cocoa","category":"farming","tba":T12_FAST,"actions_per_product":DEFAULT_AP,"drops":(Drop("cocoa_beans",2,1.0),)},
+    "mushroom":    {"name":"Mushroom","category":"farming","tba":T12_FAST,"actions_per_product":DEFAULT_AP,"drops":(Drop("mushroom",1,1.0),)},
+    "nether_wart": {"name":"Nether Wart","category":"farming","tba":T12_FAST,"actions_per_product":DEFAULT_AP,"drops":(Drop("nether_wart",2,1.0),)},
 
     # Combat (multi-drops)
     "zombie": {
-        "name":"Zombie","category":"combat","tiers":tiers_from(T12_MID),"actions_per_product":DEFAULT_AP,
-        "drops":[Drop("rotten_flesh",1,1.0), Drop("carrot",1,0.02), Drop("potato",1,0.02)]
+        "name":"Zombie","category":"combat","tba":T12_MID,"actions_per_product":DEFAULT_AP,
+        "drops":(Drop("rotten_flesh",1,1.0), Drop("carrot",1,0.02), Drop("potato",1,0.02))
     },
     "skeleton": {
-        "name":"Skeleton","category":"combat","tiers":tiers_from(T12_MID),"actions_per_product":DEFAULT_AP,
-        "drops":[Drop("bone",1,1.0), Drop("arrow",1,1.0)]
+        "name":"Skeleton","category":"combat","tba":T12_MID,"actions_per_product":DEFAULT_AP,
+        "drops":(Drop("bone",1,1.0), Drop("arrow",1,1.0))
     },
     "spider": {
-        "name":"Spider","category":"combat","tiers":tiers_from(T12_MID),"actions_per_product":DEFAULT_AP,
-        "drops":[Drop("string",1,1.0), Drop("spider_eye",1,0.5)]
+        "name":"Spider","category":"combat","tba":T12_MID,"actions_per_product":DEFAULT_AP,
+        "drops":(Drop("string",1,1.0), Drop("spider_eye",1,0.5))
     },
     "cave_spider": {
-        "name":"Cave Spider","category":"combat","tiers":tiers_from(T12_MID),"actions_per_product":DEFAULT_AP,
-        "drops":[Drop("string",1,1.0), Drop("spider_eye",1,0.8)]
+        "name":"Cave Spider","category":"combat","tba":T12_MID,"actions_per_product":DEFAULT_AP,
+        "drops":(Drop("string",1,1.0), Drop("spider_eye",1,0.8))
     },
     "enderman": {
-        "name":"Enderman","category":"combat","tiers":tiers_from(T12_MID),"actions_per_product":DEFAULT_AP,
-        "drops":[Drop("ender_pearl",1,0.6)]
+        "name":"Enderman","category":"combat","tba":T12_MID,"actions_per_product":DEFAULT_AP,
+        "drops":(Drop("ender_pearl",1,0.6),)
     },
     "slime": {
-        "name":"Slime","category":"combat","tiers":tiers_from(T12_MID),"actions_per_product":DEFAULT_AP,
-        "drops":[Drop("slimeball",2,1.0)]
+        "name":"Slime","category":"combat","tba":T12_MID,"actions_per_product":DEFAULT_AP,
+        "drops":(Drop("slimeball",2,1.0),)
     },
     "magma_cube": {
-        "name":"Magma Cube","category":"combat","tiers":tiers_from(T12_MID),"actions_per_product":DEFAULT_AP,
-        "drops":[Drop("magma_cream",1,1.0)]
+        "name":"Magma Cube","category":"combat","tba":T12_MID,"actions_per_product":DEFAULT_AP,
+        "drops":(Drop("magma_cream",1,1.0),)
     },
     "blaze": {
-        "name":"Blaze","category":"combat","tiers":tiers_from(T12_MID),"actions_per_product":DEFAULT_AP,
-        "drops":[Drop("blaze_rod",1,0.9)]
+        "name":"Blaze","category":"combat","tba":T12_MID,"actions_per_product":DEFAULT_AP,
+        "drops":(Drop("blaze_rod",1,0.9),)
     },
     "ghast": {
-        "name":"Ghast","category":"combat","tiers":tiers_from(T12_SLOW),"actions_per_product":DEFAULT_AP,
-        "drops":[Drop("gunpowder",1,1.0), Drop("ghast_tear",1,0.05)]
+        "name":"Ghast","category":"combat","tba":T12_SLOW,"actions_per_product":DEFAULT_AP,
+        "drops":(Drop("gunpowder",1,1.0), Drop("ghast_tear",1,0.05))
     },
     "cow": {
-        "name":"Cow","category":"combat","tiers":tiers_from(T12_MID),"actions_per_product":DEFAULT_AP,
-        "drops":[Drop("raw_beef",1,1.0), Drop("leather",1,0.7)]
+        "name":"Cow","category":"combat","tba":T12_MID,"actions_per_product":DEFAULT_AP,
+        "drops":(Drop("raw_beef",1,1.0), Drop("leather",1,0.7))
     },
     "chicken": {
-        "name":"Chicken","category":"combat","tiers":tiers_from(T12_MID),"actions_per_product":DEFAULT_AP,
-        "drops":[Drop("raw_chicken",1,1.0), Drop("feather",1,1.0)]
+        "name":"Chicken","category":"combat","tba":T12_MID,"actions_per_product":DEFAULT_AP,
+        "drops":(Drop("raw_chicken",1,1.0), Drop("feather",1,1.0))
     },
 
     # Fishing-like
-    "clay": {"name":"Clay","category":"fishing","tiers":tiers_from(T12_MID),"actions_per_product":DEFAULT_AP,"drops":[Drop("clay_ball",1,1.0)]},
-    "fishing": {"name":"Fishing (generic)","category":"fishing","tiers":tiers_from(T12_SLOW),"actions_per_product":DEFAULT_AP,"drops":[Drop("fish",1,0.8),Drop("salmon",1,0.2),Drop("treasure",1,0.02)]},
+    "clay": {"name":"Clay","category":"fishing","tba":T12_MID,"actions_per_product":DEFAULT_AP,"drops":(Drop("clay_ball",1,1.0),)},
+    "fishing": {"name":"Fishing (generic)","category":"fishing","tba":T12_SLOW,"actions_per_product":DEFAULT_AP,"drops":(Drop("fish",1,0.8),Drop("salmon",1,0.2),Drop("treasure",1,0.02))},
 }
 
-STORAGE_BONUS = {"none":0,"small":192,"medium":576,"large":960}
+def _frozen(d: Dict[str, Any]) -> Mapping[str, Any]:
+    # Read-only after import; interned keys let lookups short-circuit on identity
+    return MappingProxyType({sys.intern(k): v for k, v in d.items()})
+
+MINION_DATA: Mapping[str, Dict[str, Any]] = _frozen(_MINION_DATA)
+
+DIAMOND_SPREADING_DROP = Drop("diamond", 1.0, 0.10, 64)
+
+# --- Precomputed per-minion tables (everything except fuel/toggles is constant) ---
+def _drop_sum(drops: Tuple[Drop, ...]) -> float:
+    return sum(d.per_product * d.prob / d.stack for d in drops)
+
+_NAMES: Dict[str, str] = {k: d["name"] for k, d in MINION_DATA.items()}
+_TBA: Dict[str, Tuple[int, ...]] = {k: d["tba"] for k, d in MINION_DATA.items()}
+_AP: Dict[str, int] = {k: d.get("actions_per_product", DEFAULT_AP) for k, d in MINION_DATA.items()}
+_DROP_SUM: Dict[str, float] = {k: _drop_sum(d["drops"]) for k, d in MINION_DATA.items()}
+_DROP_SUM_DS: Dict[str, float] = {k: v + _drop_sum((DIAMOND_SPREADING_DROP,)) for k, v in _DROP_SUM.items()}
 
-FUEL_CHOICES = {
+STORAGE_BONUS: Mapping[str, int] = _frozen({"none":0,"small":192,"medium":576,"large":960})
+
+FUEL_CHOICES: Mapping[str, float] = _frozen({
     "1.00":1.00,"1.05":1.05,"1.10":1.10,"1.20":1.20,"1.25":1.25,"1.35":1.35,"1.90":1.90,"3.00":3.00,"4.00":4.00
+})
+_FUEL_SET = frozenset(FUEL_CHOICES.values())
+_FUEL_RE = re.compile(r"\d+(?:\.\d{1,2})?")
+
+def parse_fuel(value: str) -> float:
+    m = _FUEL_RE.fullmatch(value.strip())
+    fuel = float(m[0]) if m else 0.0
+    if fuel not in _FUEL_SET: raise ValueError("Invalid fuel.")
+    return fuel
+
+# Upgrade multiplier for every (expander, flycatchers, crystal) combo; bools index as 0/1
+SPEED_EXTRA = {
+    (e, f, c): (1.05 if e else 1.0) * (1.10 ** f) * (1.10 if c else 1.0)
+    for e in (0, 1) for f in (0, 1, 2) for c in (0, 1)
 }
 
 def speed_multiplier(fuel: float, expander: bool, flycatchers: int, crystal: bool) -> float:
-    m = fuel
-    if expander: m *= 1.05
-    if flycatchers > 0: m *= (1.10 ** min(flycatchers, 2))
-    if crystal: m *= 1.10
-    return m
+    return fuel * SPEED_EXTRA[(expander, min(flycatchers, 2), crystal)]
+
+def _sph_kernel(tba: int, ap: int, mult: float, slots_per_product: float, comp_div: int) -> float:
+    # Pure numeric core: only ints/floats in, so bulk callers can feed it table values directly
+    return mult / tba / ap * 3600.0 * slots_per_product / comp_div
 
+@lru_cache(maxsize=4096)  # also backs timer_duration_ms misses that differ only in storage
 def production_slots_per_hour(
     minion_key: str, tier: int, fuel_mult: float, expander: bool, flycatchers: int,
     crystal: bool, diamond_spreading: bool, super_compactor: bool
 ) -> float:
-    data = MINION_DATA[minion_key]
-    tba = data["tiers"][tier]["tba"]
-    ap = data.get("actions_per_product", DEFAULT_AP)
-
-    mult = speed_multiplier(fuel_mult, expander, flycatchers, crystal)
-    actions_per_sec = mult / tba
-    products_per_sec = actions_per_sec / ap
-    products_per_hour = products_per_sec * 3600.0
-
-    drops: List[Drop] = list(data["drops"])
-    if diamond_spreading:
-        drops.append(Drop("diamond", 1.0, 0.10, 64))
-
-    comp_div = 160 if super_compactor else 1
-    slots_per_hour = 0.0
-    for d in drops:
-        items_per_hour = products_per_hour * (d.per_product * d.prob)
-        slots = items_per_hour / (d.stack * comp_div)
-        slots_per_hour += slots
-    return slots_per_hour
+    return _sph_kernel(
+        _TBA[minion_key][tier-1], _AP[minion_key],
+        speed_multiplier(fuel_mult, expander, flycatchers, crystal),
+        _DROP_SUM_DS[minion_key] if diamond_spreading else _DROP_SUM[minion_key],
+        160 if super_compactor else 1,
+    )
 
 def capacity_slots(minion_key: str, tier: int, storage_key: str) -> float:
-    internal = MINION_DATA[minion_key]["tiers"][tier]["internal"]
+    internal = INTERNALS[tier-1]
     extra = STORAGE_BONUS.get(storage_key, 0)
     return (internal + extra) / 64.0
 
-def due_time_ms(
+@lru_cache(maxsize=4096)  # restarts repeat the same few configs; the result doesn't depend on start time
+def timer_duration_ms(
     minion_key: str, tier: int, fuel_mult: float, expander: bool, flycatchers: int,
-    crystal: bool, diamond_spreading: bool, super_compactor: bool, storage_key: str, start_ms_val: int
+    crystal: bool, diamond_spreading: bool, super_compactor: bool, storage_key: str
 ) -> Tuple[int, float, float]:
     sph = production_slots_per_hour(
         minion_key, tier, fuel_mult, expander, flycatchers, crystal, diamond_spreading, super_compactor
     )
     cap_slots = capacity_slots(minion_key, tier, storage_key)
-    if sph <= 0: return start_ms_val, 0.0, sph
+    if sph <= 0: return 0, 0.0, sph
     hours = cap_slots / sph
-    return int(start_ms_val + hours * 3600_000), hours, sph
+    return int(hours * 3600_000), hours, sph
+
+def due_time_ms(
+    minion_key: str, tier: int, fuel_mult: float, expander: bool, flycatchers: int,
+    crystal: bool, diamond_spreading: bool, super_compactor: bool, storage_key: str, start_ms_val: int
+) -> Tuple[int, float, float]:
+    dur, hours, sph = timer_duration_ms(
+        minion_key, tier, fuel_mult, expander, flycatchers, crystal, diamond_spreading, super_compactor, storage_key
+    )
+    return start_ms_val + dur, hours, sph
 
 # ===================== DATABASE LAYER =====================
+PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA busy_timeout=5000",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA cache_size=-20000",
+    "PRAGMA mmap_size=268435456",
+)
 CREATE_USERS = """
 CREATE TABLE IF NOT EXISTS users (
-  user_id TEXT PRIMARY KEY,
+  user_id INTEGER PRIMARY KEY,
   timezone TEXT NOT NULL DEFAULT 'UTC',
   default_notify TEXT NOT NULL DEFAULT 'dm'
 );
@@ -211,13 +252,13 @@ CREATE TABLE IF NOT EXISTS users (
 CREATE_TIMERS = """
 CREATE TABLE IF NOT EXISTS timers (
   id INTEGER PRIMARY KEY AUTOINCREMENT,
-  user_id TEXT NOT NULL,
-  guild_id TEXT,
-  channel_id TEXT,
+  user_id INTEGER NOT NULL,
+  guild_id INTEGER,
+  channel_id INTEGER,
   minion_key TEXT NOT NULL,
   tier INTEGER NOT NULL,
   storage_key TEXT NOT NULL,
-  fuel_key TEXT NOT NULL,
+  fuel_mult REAL NOT NULL,
   expander INTEGER NOT NULL DEFAULT 0,
   flycatchers INTEGER NOT NULL DEFAULT 0,
   crystal INTEGER NOT NULL DEFAULT 0,
@@ -231,152 +272,378 @@ CREATE TABLE IF NOT EXISTS timers (
   updated_at INTEGER NOT NULL
 );
 """
+CREATE_TIMER_INDEXES = (
+    "CREATE INDEX IF NOT EXISTS idx_timers_unnotified ON timers(notified, due_ms) WHERE notified=0",
+    "CREATE INDEX IF NOT EXISTS idx_timers_user ON timers(user_id, due_ms)",
+)
+# One-time migrations from earlier schemas (TEXT snowflakes, TEXT fuel_key)
+MIGRATE_USERS_INT_IDS = """
+ALTER TABLE users RENAME TO users_text_ids;
+{create}
+INSERT INTO users (user_id, timezone, default_notify)
+  SELECT CAST(user_id AS INTEGER), timezone, default_notify FROM users_text_ids;
+DROP TABLE users_text_ids;
+""".format(create=CREATE_USERS)
+MIGRATE_TIMERS_LEGACY = """
+ALTER TABLE timers RENAME TO timers_legacy;
+{create}
+INSERT INTO timers
+  (id, user_id, guild_id, channel_id, minion_key, tier, storage_key, fuel_mult,
+   expander, flycatchers, crystal, diamond_spreading, super_compactor,
+   nickname, start_ms, due_ms, notified, created_at, updated_at)
+  SELECT id, CAST(user_id AS INTEGER), CAST(guild_id AS INTEGER), CAST(channel_id AS INTEGER),
+   minion_key, tier, storage_key, CAST(fuel_key AS REAL),
+   expander, flycatchers, crystal, diamond_spreading, super_compactor,
+   nickname, start_ms, due_ms, notified, created_at, updated_at
+  FROM timers_legacy;
+DROP TABLE timers_legacy;
+""".format(create=CREATE_TIMERS)
+
+INSERT_TIMER_SQL = """INSERT INTO timers
+(user_id, guild_id, channel_id, minion_key, tier, storage_key, fuel_mult,
+ expander, flycatchers, crystal, diamond_spreading, super_compactor,
+ nickname, start_ms, due_ms, notified, created_at, updated_at)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, 0, ?, ?)"""
+
+def _insert_params(t: Dict[str, Any], now: int) -> Tuple[Any, ...]:
+    return (
+        t["user_id"], t.get("guild_id"), t.get("channel_id"),
+        t["minion_key"], t["tier"], t["storage_key"], t["fuel_mult"],
+        int(t["expander"]), int(t["flycatchers"]), int(t["crystal"]),
+        int(t["diamond_spreading"]), int(t["super_compactor"]),
+        t.get("nickname"), t["start_ms"], t["due_ms"], now, now
+    )
+
+# Single stable UPDATE: columns bound as NULL keep their current value
+TIMER_MUTABLE_COLS = (
+    "minion_key", "tier", "storage_key", "fuel_mult", "expander", "flycatchers", "crystal",
+    "diamond_spreading", "super_compactor", "nickname", "start_ms", "due_ms", "notified",
+)
+_TIMER_MUTABLE_SET = frozenset(TIMER_MUTABLE_COLS)
+UPDATE_TIMER_SQL = (
+    "UPDATE timers SET " + ", ".join(f"{c}=COALESCE(?, {c})" for c in TIMER_MUTABLE_COLS)
+    + ", updated_at=? WHERE user_id=? AND id=?"
+)
+
+TIMER_COLS = "id, minion_key, tier, storage_key, fuel_mult, expander, flycatchers, crystal, diamond_spreading, super_compactor, nickname, start_ms, due_ms, notified, channel_id, guild_id"
+# Just what a notification needs; due_s is the <t:...> timestamp
+DUE_COLS = "id, user_id, channel_id, minion_key, tier, nickname, due_ms, due_ms/1000 AS due_s"
+DUE_BATCH = 500  # bounds one watcher tick; any backlog is picked up on the next one
+
+USER_CACHE_SIZE = 10_000
+# Read-through dashboard lists; writes invalidate immediately, so the TTL only bounds
+# staleness from outside edits. Matches ManageView's timeout so Edit reuses the pick's rows.
+TIMER_LIST_TTL_SEC = 120.0
+_TIMER_BOOL_COLS = ("expander", "crystal", "diamond_spreading", "super_compactor", "notified")
+
+def _timer_dict(r: aiosqlite.Row) -> Dict[str, Any]:
+    t = dict(r)
+    for k in _TIMER_BOOL_COLS:
+        if k in t: t[k] = bool(t[k])
+    return t
 
 class DB:
     def __init__(self, path: str):
         self.path = path
         self.conn: Optional[aiosqlite.Connection] = None
+        self._users: "OrderedDict[int, Dict[str, Any]]" = OrderedDict()  # LRU of user settings
+        self._user_writes: Dict[int, asyncio.Task] = {}  # pending write-behind inserts
+        self._timer_lists: "OrderedDict[int, Tuple[float, List[Dict[str, Any]]]]" = OrderedDict()  # user_id -> (fetched at, rows)
+        self._timer_versions: Dict[int, int] = {}  # bumped on every write; a read that spans one isn't cached
+        # Lower bound on the earliest pending due_ms (None = nothing pending); may be stale-early, never late
+        self.next_due_ms: Optional[int] = None
+        self.due_changed = asyncio.Event()  # set when next_due_ms moves earlier
+        # One connection, one writer: keeps implicit and BEGIN IMMEDIATE transactions from interleaving
+        self._write_lock = asyncio.Lock()
 
     async def init(self):
+        if self.conn is not None:
+            return  # on_ready fires again after gateway reconnects; keep the one connection
         self.conn = await aiosqlite.connect(self.path)
-        await self.conn.execute(CREATE_USERS)
-        await self.conn.execute(CREATE_TIMERS)
-        await self.conn.commit()
+        try:
+            self.conn.row_factory = aiosqlite.Row
+            for stmt in PRAGMAS:
+                await self.conn.execute(stmt)
+            await self._migrate()
+            await self.conn.execute(CREATE_USERS)
+            await self.conn.execute(CREATE_TIMERS)
+            for stmt in CREATE_TIMER_INDEXES:
+                await self.conn.execute(stmt)
+            await self.conn.commit()
+            await self.refresh_next_due()
+        except Exception:
+            # Leave no half-initialized connection behind, so the next on_ready retries
+            await self.conn.close()
+            self.conn = None
+            raise
+
+    def _lower_next_due(self, due_ms: int):
+        if self.next_due_ms is None or due_ms < self.next_due_ms:
+            self.next_due_ms = due_ms
+            self.due_changed.set()
+
+    async def refresh_next_due(self):
+        # Under the write lock so a writer's _lower_next_due can't land between the SELECT and the assignment
+        async with self._write_lock:
+            async with self.conn.execute("SELECT MIN(due_ms) FROM timers WHERE notified=0") as cur:
+                row = await cur.fetchone()
+            self.next_due_ms = row[0]
+
+    async def _columns(self, table: str) -> Dict[str, str]:
+        async with self.conn.execute(f"PRAGMA table_info({table})") as cur:
+            return {r[1]: r[2].upper() for r in await cur.fetchall()}
+
+    async def _migrate(self):
+        users = await self._columns("users")
+        if users.get("user_id") == "TEXT":
+            await self.conn.executescript(f"BEGIN;\n{MIGRATE_USERS_INT_IDS}\nCOMMIT;")
+        timers = await self._columns("timers")
+        if timers.get("user_id") == "TEXT" or "fuel_key" in timers:
+            await self.conn.executescript(f"BEGIN;\n{MIGRATE_TIMERS_LEGACY}\nCOMMIT;")
+
+    def _cache_user(self, user_id: int, u: Dict[str, Any]):
+        self._users[user_id] = u
+        self._users.move_to_end(user_id)
+        if len(self._users) > USER_CACHE_SIZE:
+            self._users.popitem(last=False)
 
     async def get_user(self, user_id: int) -> Dict[str, Any]:
-        async with self.conn.execute("SELECT timezone, default_notify FROM users WHERE user_id=?", (str(user_id),)) as cur:
+        u = self._users.get(user_id)
+        if u is not None:
+            self._users.move_to_end(user_id)
+            return u
+        async with self.conn.execute("SELECT timezone, default_notify FROM users WHERE user_id=?", (user_id,)) as cur:
             row = await cur.fetchone()
         if row:
-            return {"timezone": row[0], "default_notify": row[1]}
-        await self.conn.execute("INSERT INTO users (user_id, timezone, default_notify) VALUES (?, ?, ?)", (str(user_id), DEFAULT_TZ, "dm"))
-        await self.conn.commit()
-        return {"timezone": DEFAULT_TZ, "default_notify": "dm"}
+            u = {"timezone": row[0], "default_notify": row[1]}
+        else:
+            # New user: answer with defaults now, persist off the interaction path
+            u = {"timezone": DEFAULT_TZ, "default_notify": "dm"}
+            if user_id not in self._user_writes:
+                self._user_writes[user_id] = asyncio.create_task(self._persist_user(user_id))
+        self._cache_user(user_id, u)
+        return u
+
+    async def _persist_user(self, user_id: int):
+        async with self._write_lock:
+            try:
+                await self.conn.execute("INSERT OR IGNORE INTO users (user_id, timezone, default_notify) VALUES (?, ?, ?)", (user_id, DEFAULT_TZ, "dm"))
+                await self.conn.commit()
+            finally:
+                self._user_writes.pop(user_id, None)
 
     async def set_user(self, user_id: int, tz: str, notify: str):
-        await self.conn.execute(
-            "INSERT INTO users (user_id, timezone, default_notify) VALUES (?, ?, ?) "
-            "ON CONFLICT(user_id) DO UPDATE SET timezone=excluded.timezone, default_notify=excluded.default_notify",
-            (str(user_id), tz, notify)
-        )
-        await self.conn.commit()
+        async with self._write_lock:
+            await self.conn.execute(
+                "INSERT INTO users (user_id, timezone, default_notify) VALUES (?, ?, ?) "
+                "ON CONFLICT(user_id) DO UPDATE SET timezone=excluded.timezone, default_notify=excluded.default_notify",
+                (user_id, tz, notify)
+            )
+            await self.conn.commit()
+            self._cache_user(user_id, {"timezone": tz, "default_notify": notify})
 
     async def add_timer(self, t: Dict[str, Any]) -> int:
         now = now_ms()
-        await self.conn.execute(
-            """INSERT INTO timers
-            (user_id, guild_id, channel_id, minion_key, tier, storage_key, fuel_key,
-             expander, flycatchers, crystal, diamond_spreading, super_compactor,
-             nickname, start_ms, due_ms, notified, created_at, updated_at)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, 0, ?, ?)""",
-            (
-                str(t["user_id"]), t.get("guild_id"), t.get("channel_id"),
-                t["minion_key"], t["tier"], t["storage_key"], t["fuel_key"],
-                int(t["expander"]), int(t["flycatchers"]), int(t["crystal"]),
-                int(t["diamond_spreading"]), int(t["super_compactor"]),
-                t.get("nickname"), t["start_ms"], t["due_ms"], now, now
-            )
-        )
-        await self.conn.commit()
-        async with self.conn.execute("SELECT last_insert_rowid()") as cur:
-            rid = await cur.fetchone()
-        return int(rid[0])
+        async with self._write_lock:
+            async with self.conn.execute(INSERT_TIMER_SQL + " RETURNING id", _insert_params(t, now)) as cur:
+                rid = await cur.fetchone()
+            await self.conn.commit()
+            self._invalidate_timers(t["user_id"])
+            self._lower_next_due(t["due_ms"])
+            return int(rid[0])
+
+    def _invalidate_timers(self, user_id: int):
+        self._timer_versions[user_id] = self._timer_versions.get(user_id, 0) + 1
+        self._timer_lists.pop(user_id, None)
+
+    def _cached_timers(self, user_id: int) -> Optional[List[Dict[str, Any]]]:
+        hit = self._timer_lists.get(user_id)
+        if hit is None or time.monotonic() - hit[0] >= TIMER_LIST_TTL_SEC:
+            return None
+        self._timer_lists.move_to_end(user_id)
+        return hit[1]
 
     async def list_timers(self, user_id: int) -> List[Dict[str, Any]]:
+        cached = self._cached_timers(user_id)
+        if cached is not None:
+            return cached
+        version = self._timer_versions.get(user_id, 0)
         async with self.conn.execute(
-            "SELECT id, minion_key, tier, storage_key, fuel_key, expander, flycatchers, crystal, diamond_spreading, super_compactor, nickname, start_ms, due_ms, notified, channel_id, guild_id "
+            f"SELECT {TIMER_COLS} "
             "FROM timers WHERE user_id=? ORDER BY due_ms ASC",
-            (str(user_id),)
+            (user_id,)
         ) as cur:
             rows = await cur.fetchall()
-        out=[]
-        for r in rows:
-            out.append({
-                "id": r[0], "minion_key": r[1], "tier": r[2], "storage_key": r[3], "fuel_key": r[4],
-                "expander": bool(r[5]), "flycatchers": int(r[6]), "crystal": bool(r[7]),
-                "diamond_spreading": bool(r[8]), "super_compactor": bool(r[9]),
-                "nickname": r[10], "start_ms": r[11], "due_ms": r[12], "notified": bool(r[13]),
-                "channel_id": r[14], "guild_id": r[15]
-            })
-        return out
+        timers = [_timer_dict(r) for r in rows]
+        if self._timer_versions.get(user_id, 0) != version:
+            return timers  # a write committed while we read; don't cache possibly stale rows
+        self._timer_lists[user_id] = (time.monotonic(), timers)
+        self._timer_lists.move_to_end(user_id)
+        if len(self._timer_lists) > USER_CACHE_SIZE:
+            self._timer_lists.popitem(last=False)
+        return timers
 
     async def get_timer(self, user_id: int, timer_id: int) -> Optional[Dict[str, Any]]:
+        cached = self._cached_timers(user_id)
+        if cached is not None:
+            return next((t for t in cached if t["id"] == timer_id), None)
         async with self.conn.execute(
-            "SELECT id, minion_key, tier, storage_key, fuel_key, expander, flycatchers, crystal, diamond_spreading, super_compactor, nickname, start_ms, due_ms, notified, channel_id, guild_id "
+            f"SELECT {TIMER_COLS} "
             "FROM timers WHERE user_id=? AND id=?",
-            (str(user_id), timer_id)
+            (user_id, timer_id)
         ) as cur:
             r = await cur.fetchone()
         if not r:
             return None
-        return {
-            "id": r[0], "minion_key": r[1], "tier": r[2], "storage_key": r[3], "fuel_key": r[4],
-            "expander": bool(r[5]), "flycatchers": int(r[6]), "crystal": bool(r[7]),
-            "diamond_spreading": bool(r[8]), "super_compactor": bool(r[9]),
-            "nickname": r[10], "start_ms": r[11], "due_ms": r[12], "notified": bool(r[13]),
-            "channel_id": r[14], "guild_id": r[15]
-        }
+        return _timer_dict(r)
 
     async def update_timer(self, user_id: int, timer_id: int, updates: Dict[str, Any]):
-        sets=[]; vals=[]
-        for k,v in updates.items():
-            sets.append(f"{k}=?"); vals.append(v)
-        sets.append("updated_at=?"); vals.append(now_ms())
-        vals.extend([str(user_id), timer_id])
-        await self.conn.execute(f"UPDATE timers SET {', '.join(sets)} WHERE user_id=? AND id=?", tuple(vals))
-        await self.conn.commit()
+        unknown = updates.keys() - _TIMER_MUTABLE_SET
+        if unknown: raise ValueError(f"Cannot update timer columns: {', '.join(sorted(unknown))}")
+        vals = [updates.get(k) for k in TIMER_MUTABLE_COLS]
+        vals.extend([now_ms(), user_id, timer_id])
+        async with self._write_lock:
+            await self.conn.execute(UPDATE_TIMER_SQL, vals)
+            await self.conn.commit()
+            self._invalidate_timers(user_id)
+            if updates.get("due_ms") is not None and not updates.get("notified"):
+                self._lower_next_due(updates["due_ms"])
+
+    async def restart_timer(self, user_id: int, timer_id: int, start_ms: int) -> Optional[Dict[str, Any]]:
+        async with self._write_lock:
+            # Read config, recompute due and write it back in one transaction (no read/write gap)
+            await self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                async with self.conn.execute(
+                    f"SELECT {TIMER_COLS} FROM timers WHERE user_id=? AND id=?", (user_id, timer_id)
+                ) as cur:
+                    r = await cur.fetchone()
+                if not r:
+                    await self.conn.rollback()
+                    return None
+                t = _timer_dict(r)
+                due, _, _ = due_time_ms(
+                    t["minion_key"], t["tier"], t["fuel_mult"], t["expander"], t["flycatchers"], t["crystal"],
+                    t["diamond_spreading"], t["super_compactor"], t["storage_key"], start_ms
+                )
+                async with self.conn.execute(
+                    f"UPDATE timers SET start_ms=?, due_ms=?, notified=0, updated_at=? WHERE id=? RETURNING {TIMER_COLS}",
+                    (start_ms, due, now_ms(), timer_id)
+                ) as cur:
+                    r = await cur.fetchone()
+                await self.conn.commit()
+            except Exception:
+                await self.conn.rollback()
+                raise
+            self._invalidate_timers(user_id)
+            self._lower_next_due(due)
+            return _timer_dict(r)
+
+    async def edit_timer(self, user_id: int, timer_id: int, cfg: Dict[str, Any]) -> Optional[int]:
+        # Recompute due from the stored start_ms in the same transaction, so a concurrent
+        # restart can't be overwritten with a due time based on the old start
+        async with self._write_lock:
+            await self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                async with self.conn.execute(
+                    "SELECT start_ms FROM timers WHERE user_id=? AND id=?", (user_id, timer_id)
+                ) as cur:
+                    r = await cur.fetchone()
+                if not r:
+                    await self.conn.rollback()
+                    return None
+                due, _, _ = due_time_ms(
+                    cfg["minion_key"], cfg["tier"], cfg["fuel_mult"], cfg["expander"], cfg["flycatchers"], cfg["crystal"],
+                    cfg["diamond_spreading"], cfg["super_compactor"], cfg["storage_key"], r[0]
+                )
+                updates = {**cfg, "due_ms": due, "notified": 0}
+                vals = [updates.get(k) for k in TIMER_MUTABLE_COLS]
+                vals.extend([now_ms(), user_id, timer_id])
+                await self.conn.execute(UPDATE_TIMER_SQL, vals)
+                await self.conn.commit()
+            except Exception:
+                await self.conn.rollback()
+                raise
+            self._invalidate_timers(user_id)
+            self._lower_next_due(due)
+            return due
 
     async def delete_timer(self, user_id: int, timer_id: int):
-        await self.conn.execute("DELETE FROM timers WHERE user_id=? AND id=?", (str(user_id), timer_id))
-        await self.conn.commit()
-
-    async def due_unnotified(self, ts_ms: int) -> List[Dict[str, Any]]:
-        async with self.conn.execute(
-            "SELECT id, user_id, minion_key, tier, storage_key, fuel_key, expander, flycatchers, crystal, diamond_spreading, super_compactor, nickname, start_ms, due_ms, channel_id, guild_id "
-            "FROM timers WHERE due_ms<=? AND notified=0",
-            (ts_ms,)
-        ) as cur:
-            rows = await cur.fetchall()
-        out=[]
-        for r in rows:
-            out.append({
-                "id": r[0], "user_id": int(r[1]), "minion_key": r[2], "tier": r[3], "storage_key": r[4],
-                "fuel_key": r[5], "expander": bool(r[6]), "flycatchers": int(r[7]), "crystal": bool(r[8]),
-                "diamond_spreading": bool(r[9]), "super_compactor": bool(r[10]),
-                "nickname": r[11], "start_ms": r[12], "due_ms": r[13],
-                "channel_id": r[14], "guild_id": r[15]
-            })
-        return out
-
-    async def mark_notified(self, timer_id: int):
-        await self.conn.execute("UPDATE timers SET notified=1, updated_at=? WHERE id=?", (now_ms(), timer_id))
-        await self.conn.commit()
+        async with self._write_lock:
+            await self.conn.execute("DELETE FROM timers WHERE user_id=? AND id=?", (user_id, timer_id))
+            await self.conn.commit()
+            self._invalidate_timers(user_id)
+
+    async def claim_due(self, ts_ms: int) -> List[Dict[str, Any]]:
+        async with self._write_lock:
+            await self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                async with self.conn.execute(
+                    "UPDATE timers SET notified=1, updated_at=? WHERE id IN "
+                    "(SELECT id FROM timers WHERE notified=0 AND due_ms<=? ORDER BY due_ms LIMIT ?) "
+                    f"RETURNING {DUE_COLS}",
+                    (now_ms(), ts_ms, DUE_BATCH)
+                ) as cur:
+                    rows = await cur.fetchall()
+                await self.conn.commit()
+            except Exception:
+                await self.conn.rollback()
+                raise
+            claimed = [_timer_dict(r) for r in rows]
+            for t in claimed:
+                self._invalidate_timers(t["user_id"])
+            return claimed
 
 db = DB(DB_PATH)
 
 # ===================== UI HELPERS =====================
-def timer_row_line(t: Dict[str, Any]) -> str:
-    name = MINION_DATA[t["minion_key"]]["name"]
-    due = t["due_ms"]
+_BOOL_TRUE = frozenset({"y","yes","true","1"})
+_MINION_KEYS = frozenset(MINION_DATA)
+_STORAGE_KEYS = frozenset(STORAGE_BONUS)
+_NOTIFY_KINDS = frozenset({"dm","here"})
+
+READY_TMPL = "⏰ **Minion ready:** {name} T{tier}{nick}\nDue at **<t:{ts}:F>**"
+RESTART_TMPL = "🔁 Restarted **#{tid}** • New due **<t:{ts}:F>** ({eta})"
+
+def _yn(value: str) -> bool:
+    return value.strip().lower() in _BOOL_TRUE
+
+@lru_cache(maxsize=4096)
+def _row_cached(
+    mkey: str, tier: int, nick: Optional[str], due: int, storage: str, fuel_mult: float,
+    sc: bool, exp: bool, fc: int, cry: bool, ds: bool
+) -> str:
+    name = _NAMES[mkey]
     rel = f"<t:{due//1000}:R>"
     due_abs = f"<t:{due//1000}:F>"
-    fuel = t["fuel_key"]
-    comp = "Super" if t["super_compactor"] else "None"
+    comp = "Super" if sc else "None"
     fx_bits = []
-    if t["expander"]: fx_bits.append("Exp")
-    if t["flycatchers"]>0: fx_bits.append(f"Fly×{t['flycatchers']}")
-    if t["crystal"]: fx_bits.append("Cry")
-    if t["diamond_spreading"]: fx_bits.append("DS")
+    if exp: fx_bits.append("Exp")
+    if fc>0: fx_bits.append(f"Fly×{fc}")
+    if cry: fx_bits.append("Cry")
+    if ds: fx_bits.append("DS")
     fx = f" [{', '.join(fx_bits)}]" if fx_bits else ""
-    nick = f" — {t['nickname']}" if t["nickname"] else ""
-    return f"• **{name} T{t['tier']}**{nick}\n   Storage: *{t['storage_key']}*, Fuel **x{fuel}**, Compactor: **{comp}**{fx}\n   Due: {rel} • {due_abs}"
+    nick = f" — {nick}" if nick else ""
+    return f"• **{name} T{tier}**{nick}\n   Storage: *{storage}*, Fuel **x{fuel_mult:.2f}**, Compactor: **{comp}**{fx}\n   Due: {rel} • {due_abs}"
+
+def timer_row_line(t: Dict[str, Any]) -> str:
+    return _row_cached(
+        t["minion_key"], t["tier"], t["nickname"], t["due_ms"], t["storage_key"], t["fuel_mult"],
+        t["super_compactor"], t["expander"], t["flycatchers"], t["crystal"], t["diamond_spreading"]
+    )
+
+@lru_cache(maxsize=4096)
+def _label_cached(tid: int, mkey: str, tier: int) -> str:
+    return f"#{tid} {_NAMES[mkey]} T{tier}"
+
+def timer_label(t: Dict[str, Any]) -> str:
+    return _label_cached(t["id"], t["minion_key"], t["tier"])
+
+EMPTY_DASHBOARD_TEXT = "You have no active timers.\nUse **➕ Create** to add one."
 
 def dashboard_embed(user: discord.User | discord.Member, timers: List[Dict[str, Any]]) -> discord.Embed:
-    e = discord.Embed(title=f"{user.display_name}'s Minion Timers", colour=discord.Colour.blurple())
-    if not timers:
-        e.description = "You have no active timers.\nUse **➕ Create** to add one."
-        return e
-    e.description = "\n\n".join(timer_row_line(t) for t in timers)
-    return e
+    desc = "\n\n".join(timer_row_line(t) for t in timers) if timers else EMPTY_DASHBOARD_TEXT
+    return discord.Embed(title=f"{user.display_name}'s Minion Timers", colour=discord.Colour.blurple(), description=desc)
 
 class DashboardView(discord.ui.View):
     def __init__(self, owner_id: int, timers: List[Dict[str, Any]]):
@@ -388,13 +655,44 @@ class DashboardView(discord.ui.View):
         self.add_item(discord.ui.Button(label="🔄 Refresh", style=discord.ButtonStyle.secondary, custom_id="refresh"))
         # Timer selector
         if timers:
-            opts = [discord.SelectOption(label=f"#{t['id']} {MINION_DATA[t['minion_key']]['name']} T{t['tier']}", value=str(t["id"])) for t in timers]
+            opts = [discord.SelectOption(label=timer_label(t), value=str(t["id"])) for t in timers]
             sel = discord.ui.Select(placeholder="Manage a timer (Edit/Restart/Delete)", options=opts, min_values=1, max_values=1, custom_id="pick_timer")
             self.add_item(sel)
 
     async def interaction_check(self, interaction: discord.Interaction) -> bool:
         return interaction.user.id == self.owner_id
 
+DASHBOARD_VIEW_CACHE_SIZE = 1024
+_dashboard_views: "OrderedDict[int, Tuple[Tuple[str, ...], DashboardView]]" = OrderedDict()  # message_id -> (option labels, view)
+
+def dashboard_view(message_id: int, owner_id: int, timers: List[Dict[str, Any]]) -> DashboardView:
+    # Refresh usually only moves countdowns; keep the message's view while its select options are
+    # unchanged. Keyed per message: discord.py tracks a view under one message, so sharing one
+    # across dashboards would leave store entries behind when it times out.
+    key = tuple(timer_label(t) for t in timers)
+    hit = _dashboard_views.get(message_id)
+    if hit is not None and hit[0] == key and not hit[1].is_finished():
+        _dashboard_views.move_to_end(message_id)
+        return hit[1]
+    view = DashboardView(owner_id, timers)
+    _dashboard_views[message_id] = (key, view)
+    _dashboard_views.move_to_end(message_id)
+    if len(_dashboard_views) > DASHBOARD_VIEW_CACHE_SIZE:
+        _dashboard_views.popitem(last=False)
+    return view
+
+class ManageView(discord.ui.View):
+    def __init__(self, owner_id: int, tid: int):
+        super().__init__(timeout=120)
+        self.owner_id = owner_id
+        self.tid = tid
+        self.add_item(discord.ui.Button(label="✏️ Edit", style=discord.ButtonStyle.primary, custom_id=f"edit:{tid}"))
+        self.add_item(discord.ui.Button(label="🔁 Restart", style=discord.ButtonStyle.secondary, custom_id=f"restart:{tid}"))
+        self.add_item(discord.ui.Button(label="🗑 Delete", style=discord.ButtonStyle.danger, custom_id=f"delete:{tid}"))
+
+    async def interaction_check(self, i: discord.Interaction) -> bool:
+        return i.user.id == self.owner_id
+
 # ===================== MODALS (NO add_item CALLS) =====================
 class CreateTimerModal(discord.ui.Modal, title="Create Minion Timer"):
     def __init__(self, user_id: int, default_notify: str):
@@ -415,24 +713,22 @@ class CreateTimerModal(discord.ui.Modal, title="Create Minion Timer"):
     async def on_submit(self, interaction: discord.Interaction):
         try:
             mkey = self.minion_key.value.strip().lower()
-            if mkey not in MINION_DATA: raise ValueError("Unknown minion key.")
+            if mkey not in _MINION_KEYS: raise ValueError("Unknown minion key.")
             tier = int(self.tier.value.strip())
             if not 1 <= tier <= 12: raise ValueError("Tier 1..12.")
             storage = self.storage.value.strip().lower()
-            if storage not in STORAGE_BONUS: raise ValueError("Invalid storage.")
-            fuel_key = f"{float(self.fuel.value.strip()):.2f}"
-            if fuel_key not in FUEL_CHOICES: raise ValueError("Invalid fuel.")
-            sc = self.super_compactor.value.strip().lower() in ("y","yes","true","1")
-            exp = self.expander.value.strip().lower() in ("y","yes","true","1")
+            if storage not in _STORAGE_KEYS: raise ValueError("Invalid storage.")
+            fuel_mult = parse_fuel(self.fuel.value)
+            sc = _yn(self.super_compactor.value)
+            exp = _yn(self.expander.value)
             fc = max(0, min(2, int(self.flycatchers.value.strip())))
-            cry = self.crystal.value.strip().lower() in ("y","yes","true","1")
-            ds = self.diamond_spreading.value.strip().lower() in ("y","yes","true","1")
+            cry = _yn(self.crystal.value)
+            ds = _yn(self.diamond_spreading.value)
             nick = (self.nickname.value or "").strip()
             notify = self.notify.value.strip().lower()
-            if notify not in ("dm","here"): notify = "dm"
+            if notify not in _NOTIFY_KINDS: notify = "dm"
 
             start = now_ms()
-            fuel_mult = FUEL_CHOICES[fuel_key]
             due_ms_val, hours, _ = due_time_ms(
                 mkey, tier, fuel_mult, exp, fc, cry, ds, sc, storage, start
             )
@@ -440,13 +736,13 @@ class CreateTimerModal(discord.ui.Modal, title="Create Minion Timer"):
             channel_id = interaction.channel_id if notify == "here" else None
             tid = await db.add_timer({
                 "user_id": interaction.user.id, "guild_id": interaction.guild_id, "channel_id": channel_id,
-                "minion_key": mkey, "tier": tier, "storage_key": storage, "fuel_key": fuel_key,
+                "minion_key": mkey, "tier": tier, "storage_key": storage, "fuel_mult": fuel_mult,
                 "expander": exp, "flycatchers": fc, "crystal": cry, "diamond_spreading": ds,
                 "super_compactor": sc, "nickname": nick, "start_ms": start, "due_ms": due_ms_val
             })
 
             await interaction.response.send_message(
-                f"✅ Created timer **#{tid}** for **{MINION_DATA[mkey]['name']} T{tier}** • Due **<t:{due_ms_val//1000}:F>** ({eta_str(due_ms_val-start)})",
+                f"✅ Created timer **#{tid}** for **{_NAMES[mkey]} T{tier}** • Due **<t:{due_ms_val//1000}:F>** ({eta_str(due_ms_val-start)})",
                 ephemeral=EPHEMERAL
             )
         except Exception as e:
@@ -459,7 +755,7 @@ class EditTimerModal(discord.ui.Modal, title="Edit Minion Timer"):
         self.minion_key = discord.ui.TextInput(label="Minion key", default=preset["minion_key"], max_length=32)
         self.tier = discord.ui.TextInput(label="Tier (1-12)", default=str(preset["tier"]), max_length=2)
         self.storage = discord.ui.TextInput(label="Storage (none/small/medium/large)", default=preset["storage_key"], max_length=10)
-        self.fuel = discord.ui.TextInput(label="Fuel (1.00..4.00)", default=preset["fuel_key"], max_length=4)
+        self.fuel = discord.ui.TextInput(label="Fuel (1.00..4.00)", default=f"{preset['fuel_mult']:.2f}", max_length=4)
         self.super_compactor = discord.ui.TextInput(label="Super Compactor? (yes/no)", default=("yes" if preset["super_compactor"] else "no"), max_length=3)
         self.expander = discord.ui.TextInput(label="Minion Expander? (yes/no)", default=("yes" if preset["expander"] else "no"), max_length=3)
         self.flycatchers = discord.ui.TextInput(label="Flycatchers (0-2)", default=str(preset["flycatchers"]), max_length=1)
@@ -468,34 +764,28 @@ class EditTimerModal(discord.ui.Modal, title="Edit Minion Timer"):
         self.nickname = discord.ui.TextInput(label="Nickname (optional)", default=(preset["nickname"] or ""), required=False, max_length=30)
 
     async def on_submit(self, interaction: discord.Interaction):
-        t = await db.get_timer(interaction.user.id, self.timer_id)
-        if not t:
-            await interaction.response.send_message("❌ Timer not found.", ephemeral=EPHEMERAL); return
         try:
             mkey = self.minion_key.value.strip().lower()
-            if mkey not in MINION_DATA: raise ValueError("Unknown minion.")
+            if mkey not in _MINION_KEYS: raise ValueError("Unknown minion.")
             tier = int(self.tier.value.strip())
             if not 1 <= tier <= 12: raise ValueError("Tier 1..12.")
             storage = self.storage.value.strip().lower()
-            if storage not in STORAGE_BONUS: raise ValueError("Invalid storage.")
-            fuel_key = f"{float(self.fuel.value.strip()):.2f}"
-            if fuel_key not in FUEL_CHOICES: raise ValueError("Invalid fuel.")
-            sc = self.super_compactor.value.strip().lower() in ("y","yes","true","1")
-            exp = self.expander.value.strip().lower() in ("y","yes","true","1")
+            if storage not in _STORAGE_KEYS: raise ValueError("Invalid storage.")
+            fuel_mult = parse_fuel(self.fuel.value)
+            sc = _yn(self.super_compactor.value)
+            exp = _yn(self.expander.value)
             fc = max(0, min(2, int(self.flycatchers.value.strip())))
-            cry = self.crystal.value.strip().lower() in ("y","yes","true","1")
-            ds = self.diamond_spreading.value.strip().lower() in ("y","yes","true","1")
+            cry = _yn(self.crystal.value)
+            ds = _yn(self.diamond_spreading.value)
             nick = (self.nickname.value or "").strip()
 
-            due_ms_val, _, _ = due_time_ms(
-                mkey, tier, FUEL_CHOICES[fuel_key], exp, fc, cry, ds, sc, storage, t["start_ms"]
-            )
-            await db.update_timer(interaction.user.id, self.timer_id, {
-                "minion_key": mkey, "tier": tier, "storage_key": storage, "fuel_key": fuel_key,
+            due_ms_val = await db.edit_timer(interaction.user.id, self.timer_id, {
+                "minion_key": mkey, "tier": tier, "storage_key": storage, "fuel_mult": fuel_mult,
                 "expander": int(exp), "flycatchers": int(fc), "crystal": int(cry),
-                "diamond_spreading": int(ds), "super_compactor": int(sc),
-                "nickname": nick, "due_ms": due_ms_val, "notified": 0
+                "diamond_spreading": int(ds), "super_compactor": int(sc), "nickname": nick
             })
+            if due_ms_val is None:
+                await interaction.response.send_message("❌ Timer not found.", ephemeral=EPHEMERAL); return
             await interaction.response.send_message(
                 f"✅ Updated **#{self.timer_id}** • New due **<t:{due_ms_val//1000}:F>** ({eta_str(due_ms_val-now_ms())})",
                 ephemeral=EPHEMERAL
@@ -513,18 +803,38 @@ class SettingsModal(discord.ui.Modal, title="Settings"):
     async def on_submit(self, interaction: discord.Interaction):
         tzv = self.tz.value.strip()
         nv = self.notify.value.strip().lower()
-        if nv not in ("dm","here"): nv = "dm"
+        if nv not in _NOTIFY_KINDS: nv = "dm"
         await db.set_user(interaction.user.id, tzv, nv)
         await interaction.response.send_message("✅ Settings saved.", ephemeral=EPHEMERAL)
 
 # ===================== COMMANDS & HANDLERS =====================
+def _command_tree_hash() -> str:
+    payload = [c.to_dict() for c in bot.tree.get_commands()]
+    return hashlib.sha1(json.dumps(payload, sort_keys=True).encode()).hexdigest()
+
+def _read_synced_hash() -> Optional[str]:
+    try:
+        with open(COMMANDS_HASH_PATH) as f:
+            return f.read().strip()
+    except OSError:
+        return None
+
 @bot.event
 async def on_ready():
+    global _watcher_task, _notify_tasks
     await db.init()
-    watcher.start()
+    if _watcher_task is None or _watcher_task.done():
+        _watcher_task = asyncio.create_task(watcher())
+    _notify_tasks = [w for w in _notify_tasks if not w.done()]
+    _notify_tasks += [asyncio.create_task(notify_worker()) for _ in range(NOTIFY_WORKERS - len(_notify_tasks))]
     try:
-        synced = await bot.tree.sync()
-        print(f"✅ Synced {len(synced)} commands")
+        # Global sync is rate-limited and slow; only push when the command tree changed
+        h = _command_tree_hash()
+        if SYNC_COMMANDS or _read_synced_hash() != h:
+            synced = await bot.tree.sync()
+            with open(COMMANDS_HASH_PATH, "w") as f:
+                f.write(h)
+            print(f"✅ Synced {len(synced)} commands")
     except Exception as e:
         print(f"Sync error: {e}")
     print(f"✅ Logged in as {bot.user} (ID: {bot.user.id})")
@@ -540,98 +850,178 @@ async def setup_cmd(interaction: discord.Interaction):
 async def ping(interaction: discord.Interaction):
     await interaction.response.send_message("🏓 Pong!", ephemeral=True)
 
+async def handle_create(inter: discord.Interaction, arg: str):
+    u = await db.get_user(inter.user.id)
+    await inter.response.send_modal(CreateTimerModal(inter.user.id, u["default_notify"]))
+
+async def handle_settings(inter: discord.Interaction, arg: str):
+    u = await db.get_user(inter.user.id)
+    await inter.response.send_modal(SettingsModal(inter.user.id, u["timezone"], u["default_notify"]))
+
+# Handlers that touch the DB before replying ack first (Discord allows 3s), then edit/follow up.
+# Create, Settings and Edit answer with a modal, which can't follow a defer.
+async def handle_refresh(inter: discord.Interaction, arg: str):
+    await inter.response.defer()
+    timers = await db.list_timers(inter.user.id)
+    await inter.edit_original_response(embed=dashboard_embed(inter.user, timers),
+                                       view=dashboard_view(inter.message.id, inter.user.id, timers))
+
+async def handle_pick(inter: discord.Interaction, arg: str):
+    sel = inter.data.get("values", [])
+    if not sel:
+        await inter.response.send_message("❌ No timer selected.", ephemeral=EPHEMERAL)
+        return
+    timer_id = int(sel[0])
+
+    await inter.response.send_message(f"Managing timer `#{timer_id}` — pick an action:", view=ManageView(inter.user.id, timer_id), ephemeral=EPHEMERAL)
+
+async def handle_edit(inter: discord.Interaction, arg: str):
+    tid = int(arg)
+    t = await db.get_timer(inter.user.id, tid)
+    if not t:
+        await inter.response.send_message("❌ Timer not found.", ephemeral=EPHEMERAL); return
+    await inter.response.send_modal(EditTimerModal(tid, t))
+
+async def handle_restart(inter: discord.Interaction, arg: str):
+    tid = int(arg)
+    await inter.response.defer(ephemeral=EPHEMERAL, thinking=True)
+    nm = now_ms()
+    t = await db.restart_timer(inter.user.id, tid, nm)
+    if not t:
+        await inter.followup.send("❌ Timer not found.", ephemeral=EPHEMERAL); return
+    due = t["due_ms"]
+    await inter.followup.send(RESTART_TMPL.format(tid=tid, ts=due//1000, eta=eta_str(due - nm)), ephemeral=EPHEMERAL)
+
+async def handle_delete(inter: discord.Interaction, arg: str):
+    tid = int(arg)
+    await inter.response.defer(ephemeral=EPHEMERAL, thinking=True)
+    await db.delete_timer(inter.user.id, tid)
+    await inter.followup.send(f"🗑 Deleted timer **#{tid}**.", ephemeral=EPHEMERAL)
+
+USER_INFLIGHT = 2  # component interactions handled at once per user
+_inflight: Dict[int, int] = {}
+
+# custom_id is "<action>" or "<action>:<timer id>"
+_DISPATCH = {
+    "create": handle_create,
+    "settings": handle_settings,
+    "refresh": handle_refresh,
+    "pick_timer": handle_pick,
+    "edit": handle_edit,
+    "restart": handle_restart,
+    "delete": handle_delete,
+}
+
 @bot.event
 async def on_interaction(inter: discord.Interaction):
     if inter.type != discord.InteractionType.component:
         return
     cid = inter.data.get("custom_id")
     if not cid: return
-
-    # Fetch defaults once if needed
-    if cid == "create":
-        u = await db.get_user(inter.user.id)
-        await inter.response.send_modal(CreateTimerModal(inter.user.id, u["default_notify"]))
-        return
-
-    if cid == "settings":
-        u = await db.get_user(inter.user.id)
-        await inter.response.send_modal(SettingsModal(inter.user.id, u["timezone"], u["default_notify"]))
+    action, _, arg = cid.partition(":")
+    handler = _DISPATCH.get(action)
+    if not handler:
         return
-
-    if cid == "refresh":
-        timers = await db.list_timers(inter.user.id)
-        await inter.response.edit_message(embed=dashboard_embed(inter.user, timers),
-                                          view=DashboardView(inter.user.id, timers))
-        return
-
-    if cid == "pick_timer":
-        sel = inter.data.get("values", [])
-        if not sel:
-            await inter.response.send_message("❌ No timer selected.", ephemeral=EPHEMERAL)
-            return
-        timer_id = int(sel[0])
-
-        class ManageView(discord.ui.View):
-            def __init__(self, owner_id: int, tid: int):
-                super().__init__(timeout=120)
-                self.owner_id = owner_id
-                self.tid = tid
-                self.add_item(discord.ui.Button(label="✏️ Edit", style=discord.ButtonStyle.primary, custom_id=f"edit:{tid}"))
-                self.add_item(discord.ui.Button(label="🔁 Restart", style=discord.ButtonStyle.secondary, custom_id=f"restart:{tid}"))
-                self.add_item(discord.ui.Button(label="🗑 Delete", style=discord.ButtonStyle.danger, custom_id=f"delete:{tid}"))
-
-            async def interaction_check(self, i: discord.Interaction) -> bool:
-                return i.user.id == self.owner_id
-
-        await inter.response.send_message(f"Managing timer `#{timer_id}` — pick an action:", view=ManageView(inter.user.id, timer_id), ephemeral=EPHEMERAL)
-        return
-
-    if cid.startswith("edit:"):
-        tid = int(cid.split(":")[1])
-        t = await db.get_timer(inter.user.id, tid)
-        if not t:
-            await inter.response.send_message("❌ Timer not found.", ephemeral=EPHEMERAL); return
-        await inter.response.send_modal(EditTimerModal(tid, t))
+    uid = inter.user.id
+    n = _inflight.get(uid, 0)
+    if n >= USER_INFLIGHT:
+        # Click-spam: ack so Discord doesn't show a failure, but don't queue more DB work
+        await inter.response.defer()
         return
+    _inflight[uid] = n + 1
+    try:
+        await handler(inter, arg)
+    finally:
+        n = _inflight.pop(uid) - 1
+        if n:
+            _inflight[uid] = n
 
-    if cid.startswith("restart:"):
-        tid = int(cid.split(":")[1])
-        t = await db.get_timer(inter.user.id, tid)
-        if not t:
-            await inter.response.send_message("❌ Timer not found.", ephemeral=EPHEMERAL); return
-        due, _, _ = due_time_ms(
-            t["minion_key"], t["tier"], FUEL_CHOICES[t["fuel_key"]], t["expander"], t["flycatchers"], t["crystal"],
-            t["diamond_spreading"], t["super_compactor"], t["storage_key"], now_ms()
-        )
-        await db.update_timer(inter.user.id, tid, {"start_ms": now_ms(), "due_ms": due, "notified": 0})
-        await inter.response.send_message(f"🔁 Restarted **#{tid}** • New due **<t:{due//1000}:F>** ({eta_str(due - now_ms())})", ephemeral=EPHEMERAL)
-        return
+# ===================== NOTIFICATIONS =====================
+NOTIFY_WORKERS = 16  # in-flight sends, keeps bursts under Discord's per-route limits
+# Claimed timers waiting to be sent, with their resolved channel (None = DM); bounded so a
+# stalled Discord pushes back on the watcher instead of piling up claims in memory
+_notify_q: "asyncio.Queue[Tuple[Dict[str, Any], Optional[discord.abc.Messageable]]]" = asyncio.Queue(maxsize=DUE_BATCH)
+
+USER_TTL_SEC = 3600
+USER_LRU_SIZE = 4096
+_fetched_users: "OrderedDict[int, Tuple[float, discord.User]]" = OrderedDict()
+_user_fetches: Dict[int, "asyncio.Future[discord.User]"] = {}  # in-flight fetch_user calls
+
+async def _get_user(uid: int) -> discord.User:
+    u = bot.get_user(uid)  # gateway cache, no HTTP
+    if u is not None:
+        return u
+    now = time.monotonic()
+    hit = _fetched_users.get(uid)
+    if hit and now - hit[0] < USER_TTL_SEC:
+        _fetched_users.move_to_end(uid)
+        return hit[1]
+    # Workers notifying the same user share one REST fetch
+    fut = _user_fetches.get(uid)
+    if fut is None:
+        fut = _user_fetches[uid] = asyncio.ensure_future(bot.fetch_user(uid))
+        fut.add_done_callback(lambda _: _user_fetches.pop(uid, None))
+    u = await asyncio.shield(fut)
+    _fetched_users[uid] = (now, u)
+    _fetched_users.move_to_end(uid)
+    if len(_fetched_users) > USER_LRU_SIZE:
+        _fetched_users.popitem(last=False)
+    return u
+
+async def _notify(t: Dict[str, Any], chan: Optional[discord.abc.Messageable]):
+    dest: discord.abc.Messageable = chan or await _get_user(t["user_id"])
+    nick = f" — {t['nickname']}" if t["nickname"] else ""
+    await dest.send(READY_TMPL.format(name=_NAMES[t["minion_key"]], tier=t["tier"], nick=nick, ts=t["due_s"]))
 
-    if cid.startswith("delete:"):
-        tid = int(cid.split(":")[1])
-        await db.delete_timer(inter.user.id, tid)
-        await inter.response.send_message(f"🗑 Deleted timer **#{tid}**.", ephemeral=EPHEMERAL)
-        return
+async def notify_worker():
+    while True:
+        t, chan = await _notify_q.get()
+        try:
+            await _notify(t, chan)
+        except Exception as e:
+            # Already claimed; a failed send is not retried
+            print(f"Notify error (timer #{t['id']}): {e}")
+        finally:
+            _notify_q.task_done()
+
+async def watcher_tick():
+    now = now_ms()
+    if db.next_due_ms is not None and now < db.next_due_ms:
+        return  # nothing due yet; skip the DB entirely
+    # With no known pending timer this still runs once per CHECK_INTERVAL_SEC, so a
+    # wrong in-memory bound can't silence the watcher for good
+    due = await db.claim_due(now)
+    # Claimed rows are already marked notified; queue them before anything else can fail
+    try:
+        # Resolve each target channel once per tick; missing channels fall back to DMs
+        chan_map = {cid: bot.get_channel(cid) for cid in {t["channel_id"] for t in due if t["channel_id"]}}
+        for t in due:
+            await _notify_q.put((t, chan_map.get(t["channel_id"])))
+    finally:
+        await db.refresh_next_due()
 
-# ===================== NOTIFICATIONS =====================
-@tasks.loop(seconds=CHECK_INTERVAL_SEC)
 async def watcher():
-    due = await db.due_unnotified(now_ms())
-    for t in due:
+    while True:
+        db.due_changed.clear()
+        delay = CHECK_INTERVAL_SEC
         try:
-            dest: Optional[discord.abc.Messageable] = None
-            if t["channel_id"]:
-                ch = bot.get_channel(int(t["channel_id"]))
-                if ch: dest = ch
-            if dest is None:
-                u = await bot.fetch_user(int(t["user_id"]))
-                dest = u
-            name = MINION_DATA[t["minion_key"]]["name"]
-            nick = f" — {t['nickname']}" if t["nickname"] else ""
-            await dest.send(f"⏰ **Minion ready:** {name} T{t['tier']}{nick}\nDue at **<t:{t['due_ms']//1000}:F>**")
-            await db.mark_notified(t["id"])
-        except Exception:
-            await db.mark_notified(t["id"])
+            await watcher_tick()
+        except Exception as e:
+            # next_due_ms is still in the past after a failed tick; wait out the full
+            # interval instead of retrying immediately
+            print(f"Watcher error: {e}")
+        else:
+            # Sleep until the next due time or an earlier timer is added; the cap keeps
+            # catch-up working after host sleep, when the monotonic clock stalls
+            if db.next_due_ms is not None:
+                delay = min(delay, max(0.0, (db.next_due_ms - now_ms()) / 1000))
+        try:
+            await asyncio.wait_for(db.due_changed.wait(), timeout=delay)
+        except asyncio.TimeoutError:
+            pass
+
+_watcher_task: Optional[asyncio.Task] = None
+_notify_tasks: List[asyncio.Task] = []
 
 # ===================== RUN =====================
 if __name__ == "__main__":